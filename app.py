@@ -1,14 +1,100 @@
+import asyncio
+import functools
+import itertools
+import logging
+import orjson
+import os
+import redis.asyncio as redis
 import sqlalchemy
+import time
 import uvicorn
+from contextlib import asynccontextmanager, suppress
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import create_async_engine
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from starlette.requests import Request
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from decimal import Decimal
+from typing import Optional, List, Mapping
 
 from sandbox.settings import DatabaseSettings
 
-app = FastAPI(title="Interview Sandbox API")
+logger = logging.getLogger(__name__)
+
+# ============ Database ============
+
+SETTINGS = DatabaseSettings()
+URI = sqlalchemy.engine.URL.create(
+    "postgresql+asyncpg",
+    username=SETTINGS.user.get_secret_value(),
+    password=SETTINGS.password.get_secret_value(),
+    host=SETTINGS.host.get_secret_value(),
+    port=int(SETTINGS.port.get_secret_value()),
+    database=SETTINGS.database_name,
+)
+# Set DATABASE_PGBOUNCER=1 when the settings point at PgBouncer in transaction
+# pooling mode (see pgbouncer/pgbouncer.ini). Consecutive transactions may then
+# land on different server connections, so statements must not be cached per
+# connection and prepared statement names must be unique.
+PGBOUNCER = os.getenv("DATABASE_PGBOUNCER", "").lower() in ("1", "true", "yes")
+
+if PGBOUNCER:
+    connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+else:
+    # Each statement is prepared on its first execution on a pooled connection
+    # and reused from then on; the cache must hold every statement in this
+    # module (including all _Q_LIST_TRANSACTIONS variants) to stay warm.
+    connect_args = {"prepared_statement_cache_size": 100}
+
+ENGINE = create_async_engine(
+    URI,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    connect_args=connect_args,
+)
+
+# Optional second-level cache for per-user reads; disabled when REDIS_URL is unset.
+REDIS_URL = os.getenv("REDIS_URL")
+# Short socket timeouts so an unreachable Redis fails fast into the Postgres fallback
+REDIS = redis.from_url(REDIS_URL, socket_connect_timeout=0.1, socket_timeout=0.1) if REDIS_URL else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the pool before serving and dispose of it on shutdown"""
+    await warm_pool()
+    refresh_task = asyncio.create_task(refresh_daily_summary())
+    yield
+    refresh_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresh_task
+    if REDIS is not None:
+        await REDIS.aclose()
+    await ENGINE.dispose()
+
+# ============ JSON ============
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response that also encodes RowMappings and numeric-column Decimals"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+app = FastAPI(title="Interview Sandbox API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # ============ Response Models ============
 
@@ -29,6 +115,28 @@ class TransactionResponse(BaseModel):
     created: datetime
     updated: datetime
 
+class TransactionListItem(BaseModel):
+    id: str
+    user_id: int
+    amount: float
+    currency: str
+    created: datetime
+
+class UserCursor(BaseModel):
+    after_id: int
+
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[UserCursor]
+
+class TransactionCursor(BaseModel):
+    after_created: datetime
+    after_id: str
+
+class TransactionPage(BaseModel):
+    items: List[TransactionListItem]
+    next_cursor: Optional[TransactionCursor]
+
 class TransactionSummary(BaseModel):
     total_amount: float
     transaction_count: int
@@ -55,6 +163,11 @@ class TopUser(BaseModel):
     total_amount: float
     transaction_count: int
 
+class Dashboard(BaseModel):
+    summary: Optional[TransactionSummary]
+    top_users: List[TopUser]
+    daily: List[DailySummary]
+
 class SuspiciousTransaction(BaseModel):
     id: str
     user_id: int
@@ -62,21 +175,419 @@ class SuspiciousTransaction(BaseModel):
     reason: str
     created: datetime
 
+# ============ Queries ============
+
+# transactions.status is generated from (pending, paid) by migrations/004
+TRANSACTION_STATUS_PENDING = 0
+TRANSACTION_STATUS_UNPAID = 1
+TRANSACTION_STATUS_PAID = 2
+
+_Q_HEALTH = sqlalchemy.text("SELECT 1")
+
+_Q_LIST_USERS = sqlalchemy.text(
+    "SELECT id, email, created, updated FROM users ORDER BY id LIMIT :limit OFFSET :skip"
+)
+
+_Q_LIST_USERS_AFTER = sqlalchemy.text(
+    "SELECT id, email, created, updated FROM users WHERE id > :after_id ORDER BY id LIMIT :limit"
+)
+
+_Q_GET_USER = sqlalchemy.text("SELECT id, email, created, updated FROM users WHERE id = :user_id")
+
+_Q_USER_TRANSACTIONS = sqlalchemy.text("""
+    SELECT id, user_id, amount, currency, created
+    FROM transactions
+    WHERE user_id = :user_id
+    ORDER BY created DESC
+    LIMIT :limit
+""")
+
+def _list_transactions_query(by_pending: bool, by_paid: bool, keyset: bool) -> sqlalchemy.TextClause:
+    filters = []
+    if by_pending:
+        filters.append("pending = :pending")
+    if by_paid:
+        filters.append("paid = :paid")
+    if keyset:
+        filters.append("(created, id) < (:after_created, :after_id)")
+    where_clause = "WHERE " + " AND ".join(filters) if filters else ""
+    pagination = "LIMIT :limit" if keyset else "LIMIT :limit OFFSET :skip"
+    return sqlalchemy.text(f"""
+        SELECT id, user_id, amount, currency, created
+        FROM transactions
+        {where_clause}
+        ORDER BY created DESC, id DESC
+        {pagination}
+    """)
+
+# Keyed by (pending is not None, paid is not None, keyset)
+_Q_LIST_TRANSACTIONS = {
+    key: _list_transactions_query(*key)
+    for key in itertools.product((False, True), repeat=3)
+}
+
+_Q_TRANSACTION_SUMMARY = sqlalchemy.text("""
+    SELECT
+        COALESCE(SUM(amount), 0) as total_amount,
+        COUNT(*) as transaction_count,
+        COALESCE(AVG(amount), 0)::float8 as average_amount,
+        currency
+    FROM transactions
+    GROUP BY currency
+    LIMIT 1
+""")
+
+_Q_USER_STATS = sqlalchemy.text("""
+    WITH u AS (
+        SELECT id, email FROM users WHERE id = :user_id
+    ), s AS (
+        SELECT
+            SUM(amount) as total_amount,
+            COUNT(*) as transaction_count,
+            AVG(amount) as average_amount,
+            SUM(pending::int) as pending_count,
+            SUM(paid::int) as paid_count
+        FROM transactions
+        WHERE user_id = :user_id
+    )
+    SELECT
+        u.id as user_id,
+        u.email,
+        COALESCE(s.total_amount, 0) as total_amount,
+        s.transaction_count,
+        COALESCE(s.average_amount, 0)::float8 as average_amount,
+        COALESCE(s.pending_count, 0) as pending_count,
+        COALESCE(s.paid_count, 0) as paid_count
+    FROM u
+    CROSS JOIN s
+""")
+
+# Reads the transactions_daily materialized view (migrations/006), which
+# refresh_daily_summary() keeps up to date in the background.
+_Q_DAILY_SUMMARY = sqlalchemy.text("""
+    SELECT COALESCE(json_agg(r ORDER BY r.date DESC), '[]')::text
+    FROM (
+        SELECT
+            day::text as date,
+            transaction_count,
+            total_amount::float8 as total_amount
+        FROM transactions_daily
+        WHERE day > CURRENT_DATE - CAST(:days AS integer)
+    ) r
+""")
+
+_Q_REFRESH_DAILY_SUMMARY = sqlalchemy.text("REFRESH MATERIALIZED VIEW CONCURRENTLY transactions_daily")
+
+DAILY_SUMMARY_REFRESH_SECONDS = 300
+
+# Transaction-scoped advisory lock so only one worker refreshes transactions_daily at a time
+DAILY_SUMMARY_REFRESH_LOCK = 7_210_001
+
+_Q_TRY_REFRESH_LOCK = sqlalchemy.text(f"SELECT pg_try_advisory_xact_lock({DAILY_SUMMARY_REFRESH_LOCK})")
+
+# Claims this interval's refresh; updates no row if another worker already refreshed
+# within the last half interval.
+_Q_CLAIM_DAILY_REFRESH = sqlalchemy.text(f"""
+    UPDATE transactions_daily_refreshed
+    SET refreshed_at = now()
+    WHERE refreshed_at < now() - INTERVAL '{DAILY_SUMMARY_REFRESH_SECONDS // 2} seconds'
+""")
+
+_Q_PENDING_TRANSACTIONS = sqlalchemy.text(f"""
+    SELECT id, user_id, amount, currency, created
+    FROM transactions
+    WHERE status = {TRANSACTION_STATUS_PENDING}
+    ORDER BY created DESC
+    LIMIT :limit
+""")
+
+_Q_TOP_USERS = sqlalchemy.text("""
+    WITH t AS (
+        SELECT
+            user_id,
+            SUM(amount)::float8 as total_amount,
+            COUNT(*) as transaction_count
+        FROM transactions
+        GROUP BY user_id
+        ORDER BY total_amount DESC
+        LIMIT :limit
+    )
+    SELECT COALESCE(json_agg(r ORDER BY r.total_amount DESC), '[]')::text
+    FROM (
+        SELECT
+            u.id as user_id,
+            u.email,
+            t.total_amount,
+            t.transaction_count
+        FROM t
+        JOIN users u ON u.id = t.user_id
+    ) r
+""")
+
+# The summary, top-users and daily queries combined into one JSON document so a
+# dashboard is served by a single statement and round trip. Only their SQL text
+# is reused, so any bind typing they need (e.g. CAST(:days AS integer)) must be
+# written in that text rather than attached with bindparams().
+_Q_DASHBOARD = sqlalchemy.text(f"""
+    SELECT json_build_object(
+        'summary', (SELECT row_to_json(s) FROM ({_Q_TRANSACTION_SUMMARY.text}) s),
+        'top_users', ({_Q_TOP_USERS.text})::json,
+        'daily', ({_Q_DAILY_SUMMARY.text})::json
+    )::text
+""")
+
+_Q_AMOUNT_P90 = sqlalchemy.text(
+    "SELECT PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY amount) FROM transactions"
+)
+
+_Q_SUSPICIOUS_TRANSACTIONS = sqlalchemy.text("""
+    SELECT
+        id,
+        user_id,
+        amount,
+        'Large transaction (>90th percentile)' as reason,
+        created
+    FROM transactions
+    WHERE amount > :p90
+    ORDER BY amount DESC
+    LIMIT :limit
+""")
+
+_Q_UNPAID_TRANSACTIONS = sqlalchemy.text(f"""
+    SELECT id, user_id, amount, currency, created
+    FROM transactions
+    WHERE status = {TRANSACTION_STATUS_UNPAID}
+    ORDER BY created DESC
+    LIMIT :limit
+""")
+
+# ============ Startup ============
+
+# Bounded statements run on every pooled connection at startup so they are
+# compiled and prepared before the first request. The full-table aggregates
+# (summary, top users, p90) are left to warm up on first use.
+_WARMUP_QUERIES = [
+    (_Q_HEALTH, {}),
+    (_Q_LIST_USERS, {"limit": 1, "skip": 0}),
+    (_Q_LIST_USERS_AFTER, {"limit": 1, "after_id": 0}),
+    (_Q_GET_USER, {"user_id": 0}),
+    (_Q_USER_TRANSACTIONS, {"user_id": 0, "limit": 1}),
+    (_Q_USER_STATS, {"user_id": 0}),
+    (_Q_DAILY_SUMMARY, {"days": 1}),
+    (_Q_PENDING_TRANSACTIONS, {"limit": 1}),
+    (_Q_UNPAID_TRANSACTIONS, {"limit": 1}),
+    (_Q_SUSPICIOUS_TRANSACTIONS, {"p90": 1e18, "limit": 1}),
+] + [
+    (
+        query,
+        {
+            "limit": 1,
+            "skip": 0,
+            "pending": True,
+            "paid": True,
+            "after_created": datetime.max,
+            "after_id": "",
+        },
+    )
+    for query in _Q_LIST_TRANSACTIONS.values()
+]
+
+async def warm_pool():
+    """Open pool_size connections at once and run the warm-up statements on each"""
+    # Warm-up is only an optimisation, so failures are logged and never block startup
+    async def warm_connection():
+        try:
+            async with ENGINE.connect() as connection:
+                for query, params in _WARMUP_QUERIES:
+                    try:
+                        await connection.execute(query, params)
+                    except sqlalchemy.exc.DBAPIError:
+                        logger.warning("Warm-up statement failed: %s", query, exc_info=True)
+                        await connection.rollback()
+        except Exception:
+            logger.warning("Failed to warm a pooled connection", exc_info=True)
+
+    await asyncio.gather(*(warm_connection() for _ in range(ENGINE.pool.size())))
+
+# ============ Caches ============
+
+P90_TTL_SECONDS = 60
+AGGREGATE_TTL_SECONDS = 10
+
+def ttl_cached(ttl: float):
+    """Cache an async loader's result per argument tuple (excluding the connection) for ttl seconds"""
+    def decorator(func):
+        entries = {}
+        locks = {}
+
+        @functools.wraps(func)
+        async def wrapper(connection, *args):
+            entry = entries.get(args)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            # Concurrent misses wait here so only one of them reaches the database
+            async with locks.setdefault(args, asyncio.Lock()):
+                entry = entries.get(args)
+                if entry and entry[1] > time.monotonic():
+                    return entry[0]
+                value = await func(connection, *args)
+                entries[args] = (value, time.monotonic() + ttl)
+                return value
+
+        return wrapper
+    return decorator
+
+@ttl_cached(ttl=P90_TTL_SECONDS)
+async def get_p90(connection) -> Optional[float]:
+    """Get the 90th-percentile transaction amount"""
+    result = await connection.execute(_Q_AMOUNT_P90)
+    return result.scalar()
+
+@ttl_cached(ttl=AGGREGATE_TTL_SECONDS)
+async def get_transaction_summary(connection):
+    """Get the aggregate transaction summary row"""
+    result = await connection.execute(_Q_TRANSACTION_SUMMARY)
+    return result.mappings().first()
+
+@ttl_cached(ttl=AGGREGATE_TTL_SECONDS)
+async def get_top_users(connection, limit: int):
+    """Get the top users by total transaction amount as a JSON array"""
+    result = await connection.execute(_Q_TOP_USERS, {"limit": limit})
+    return result.scalar()
+
+@ttl_cached(ttl=AGGREGATE_TTL_SECONDS)
+async def get_dashboard(connection, limit: int, days: int):
+    """Get the summary, top users and daily totals as one JSON object"""
+    result = await connection.execute(_Q_DASHBOARD, {"limit": limit, "days": days})
+    return result.scalar()
+
+USER_CACHE_TTL_SECONDS = 60
+USER_TRANSACTIONS_PAGE_SIZE = 50
+
+async def redis_cached(key: str, ttl: int, loader) -> Optional[bytes]:
+    """Get the JSON cached in Redis under key, or load, encode and cache it for ttl seconds"""
+    # Redis being unset or unavailable falls back to the loader rather than failing the request
+    if REDIS is not None:
+        try:
+            cached = await REDIS.get(key)
+        except redis.RedisError:
+            logger.warning("Redis GET %s failed", key, exc_info=True)
+        else:
+            if cached is not None:
+                return cached
+
+    value = await loader()
+    # Misses are not cached so a user created later is found immediately
+    if value is None:
+        return None
+    payload = orjson.dumps(value, default=_json_default)
+
+    if REDIS is not None:
+        try:
+            await REDIS.set(key, payload, ex=ttl)
+        except redis.RedisError:
+            logger.warning("Redis SET %s failed", key, exc_info=True)
+    return payload
+
+# ============ Background Tasks ============
+
+async def refresh_daily_summary():
+    """Refresh the transactions_daily materialized view every few minutes until cancelled"""
+    while True:
+        # Wake on wall-clock interval boundaries so all workers try together and
+        # exactly one of them claims the refresh.
+        await asyncio.sleep(DAILY_SUMMARY_REFRESH_SECONDS - time.time() % DAILY_SUMMARY_REFRESH_SECONDS)
+        try:
+            async with ENGINE.begin() as connection:
+                locked = await connection.execute(_Q_TRY_REFRESH_LOCK)
+                if not locked.scalar():
+                    continue
+                claimed = await connection.execute(_Q_CLAIM_DAILY_REFRESH)
+                if claimed.rowcount:
+                    await connection.execute(_Q_REFRESH_DAILY_SUMMARY)
+        except Exception:
+            logger.exception("Failed to refresh transactions_daily")
+
+# ============ Streaming ============
+
+STREAM_BATCH_SIZE = 100
+
+async def stream_rows(query: sqlalchemy.TextClause, params: dict):
+    """Start a server-side cursor and return an async iterator over its row batches"""
+    # Streamed bodies outlive the request's middleware connection, so use a dedicated one
+    connection = await ENGINE.connect()
+    try:
+        result = await connection.stream(query, params, execution_options={"yield_per": STREAM_BATCH_SIZE})
+        partitions = result.mappings().partitions()
+        # Fetch the first batch here so query errors are raised before the 200 is sent
+        first = await anext(partitions, None)
+    except BaseException:
+        await connection.close()
+        raise
+
+    async def batches():
+        try:
+            if first is not None:
+                yield first
+                async for rows in partitions:
+                    yield rows
+        finally:
+            await connection.close()
+
+    return batches()
+
+async def json_array(batches):
+    """Encode batches of rows as a single JSON array, one batch at a time"""
+    yield b"["
+    separator = b""
+    async for rows in batches:
+        yield separator + orjson.dumps(rows, default=_json_default)[1:-1]
+        separator = b","
+    yield b"]"
+
+async def json_page(batches, limit: int, cursor_for):
+    """Encode batches of rows as an {"items", "next_cursor"} page"""
+    last, count = None, 0
+
+    async def tracked():
+        nonlocal last, count
+        async for rows in batches:
+            last, count = rows[-1], count + len(rows)
+            yield rows
+
+    yield b'{"items":'
+    async for chunk in json_array(tracked()):
+        yield chunk
+    # Only a full page can have a next one
+    next_cursor = cursor_for(last) if count == limit else None
+    yield b',"next_cursor":' + orjson.dumps(next_cursor, default=_json_default) + b"}"
+
 # ============ Middleware ============
 
+class LazyConnection:
+    """Connection stand-in that checks out a pooled connection on first execute"""
+
+    def __init__(self, engine):
+        self._engine = engine
+        self._connection = None
+
+    async def execute(self, *args, **kwargs):
+        if self._connection is None:
+            self._connection = await self._engine.connect()
+        return await self._connection.execute(*args, **kwargs)
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+
 @app.middleware("http")
 async def open_connection(request: Request, call_next):
-    s = DatabaseSettings()
-    uri = (
-        f"postgresql+psycopg://"
-        f"{s.user.get_secret_value()}:"
-        f"{s.password.get_secret_value()}@"
-        f"{s.host.get_secret_value()}:"
-        f"{s.port.get_secret_value()}/{s.database_name}"
-    )
-    with sqlalchemy.create_engine(uri).connect() as connection:
-        request.state.connection = connection
+    connection = LazyConnection(ENGINE)
+    request.state.connection = connection
+    try:
         return await call_next(request)
+    finally:
+        await connection.close()
 
 # ============ Health Check ============
 
@@ -84,236 +595,175 @@ async def open_connection(request: Request, call_next):
 async def health_check(request: Request):
     """Simple health check endpoint to verify database connection"""
     try:
-        result = request.state.connection.execute(sqlalchemy.text("SELECT 1"))
+        result = await request.state.connection.execute(_Q_HEALTH)
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
 
 # ============ User Endpoints ============
 
-@app.get("/users", response_model=List[UserResponse])
-async def list_users(request: Request, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
-    """Get all users with pagination"""
-    query = "SELECT id, email, created, updated FROM users ORDER BY id LIMIT :limit OFFSET :skip"
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
-        {"limit": limit, "skip": skip}
-    )
-    users = [dict(row._mapping) for row in result]
-    return users
+@app.get("/users", response_model=UserPage)
+async def list_users(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    after_id: Optional[int] = None
+):
+    """Get users with offset or keyset (after_id) pagination"""
+    if after_id is not None and skip:
+        raise HTTPException(status_code=400, detail="skip cannot be combined with after_id")
+
+    if after_id is None:
+        query, params = _Q_LIST_USERS, {"limit": limit, "skip": skip}
+    else:
+        query, params = _Q_LIST_USERS_AFTER, {"limit": limit, "after_id": after_id}
+
+    result = await request.state.connection.execute(query, params)
+    users = result.mappings().all()
+    next_cursor = {"after_id": users[-1]["id"]} if len(users) == limit else None
+    return FastJSONResponse({"items": users, "next_cursor": next_cursor})
 
 @app.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(request: Request, user_id: int):
     """Get a specific user by ID"""
-    query = "SELECT id, email, created, updated FROM users WHERE id = :user_id"
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
-        {"user_id": user_id}
-    )
-    user = result.first()
+    async def load():
+        result = await request.state.connection.execute(
+            _Q_GET_USER,
+            {"user_id": user_id}
+        )
+        return result.mappings().first()
+
+    user = await redis_cached(f"user:{user_id}", USER_CACHE_TTL_SECONDS, load)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return dict(user._mapping)
+    return Response(user, media_type="application/json")
 
-@app.get("/users/{user_id}/transactions", response_model=List[TransactionResponse])
-async def get_user_transactions(request: Request, user_id: int, limit: int = Query(50, ge=1, le=500)):
+@app.get("/users/{user_id}/transactions", response_model=List[TransactionListItem])
+async def get_user_transactions(
+    request: Request,
+    user_id: int,
+    limit: int = Query(USER_TRANSACTIONS_PAGE_SIZE, ge=1, le=500)
+):
     """Get all transactions for a specific user"""
-    query = """
-        SELECT id, user_id, amount, currency, subid, pending, paid, created, updated
-        FROM transactions
-        WHERE user_id = :user_id
-        ORDER BY created DESC
-        LIMIT :limit
-    """
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
-        {"user_id": user_id, "limit": limit}
-    )
-    transactions = [dict(row._mapping) for row in result]
-    return transactions
+    async def load():
+        result = await request.state.connection.execute(
+            _Q_USER_TRANSACTIONS,
+            {"user_id": user_id, "limit": limit}
+        )
+        return result.mappings().all()
+
+    # Only the default first page is cached, to keep one key per user.
+    if limit != USER_TRANSACTIONS_PAGE_SIZE:
+        return FastJSONResponse(await load())
+    transactions = await redis_cached(f"user:{user_id}:txns:{limit}", USER_CACHE_TTL_SECONDS, load)
+    return Response(transactions, media_type="application/json")
 
 # ============ Transaction Endpoints ============
 
-@app.get("/transactions", response_model=List[TransactionResponse])
+@app.get("/transactions", response_model=TransactionPage)
 async def list_transactions(
     request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=500),
     pending: Optional[bool] = None,
-    paid: Optional[bool] = None
+    paid: Optional[bool] = None,
+    after_created: Optional[datetime] = None,
+    after_id: Optional[str] = None
 ):
-    """Get transactions with optional filtering by status"""
-    where_clauses = []
-    params = {"limit": limit, "skip": skip}
-
-    if pending is not None:
-        where_clauses.append("pending = :pending")
-        params["pending"] = pending
-
-    if paid is not None:
-        where_clauses.append("paid = :paid")
-        params["paid"] = paid
-
-    where_clause = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
-
-    query = f"""
-        SELECT id, user_id, amount, currency, subid, pending, paid, created, updated
-        FROM transactions
-        {where_clause}
-        ORDER BY created DESC
-        LIMIT :limit OFFSET :skip
-    """
-    result = request.state.connection.execute(sqlalchemy.text(query), params)
-    transactions = [dict(row._mapping) for row in result]
-    return transactions
+    """Get transactions with optional filtering by status and offset or keyset pagination"""
+    keyset = after_created is not None or after_id is not None
+    if keyset and (after_created is None or after_id is None):
+        raise HTTPException(status_code=400, detail="after_created and after_id must be given together")
+    if keyset and skip:
+        raise HTTPException(status_code=400, detail="skip cannot be combined with after_created/after_id")
+
+    # Each variant only binds the parameters it references; the rest are ignored.
+    query = _Q_LIST_TRANSACTIONS[(pending is not None, paid is not None, keyset)]
+    params = {
+        "limit": limit,
+        "skip": skip,
+        "pending": pending,
+        "paid": paid,
+        "after_created": after_created,
+        "after_id": after_id,
+    }
+    page = json_page(
+        await stream_rows(query, params),
+        limit,
+        lambda last: {"after_created": last["created"], "after_id": last["id"]},
+    )
+    return StreamingResponse(page, media_type="application/json")
 
 @app.get("/transactions/summary", response_model=TransactionSummary)
 async def transaction_summary(request: Request):
     """Get aggregate transaction statistics across all users"""
-    query = """
-        SELECT
-            COALESCE(SUM(amount), 0) as total_amount,
-            COUNT(*) as transaction_count,
-            ROUND(COALESCE(AVG(amount), 0)::numeric, 2)::float as average_amount,
-            currency
-        FROM transactions
-        GROUP BY currency
-        LIMIT 1
-    """
-    result = request.state.connection.execute(sqlalchemy.text(query))
-    row = result.first()
+    row = await get_transaction_summary(request.state.connection)
     if not row:
         raise HTTPException(status_code=500, detail="Failed to fetch summary")
-    data = dict(row._mapping)
-    return data
+    return row
 
 @app.get("/transactions/user/{user_id}/stats", response_model=UserStats)
 async def user_transaction_stats(request: Request, user_id: int):
     """Get transaction statistics for a specific user"""
-    query = """
-        SELECT
-            :user_id as user_id,
-            u.email,
-            COALESCE(SUM(t.amount), 0) as total_amount,
-            COUNT(t.id) as transaction_count,
-            ROUND(COALESCE(AVG(t.amount), 0)::numeric, 2)::float as average_amount,
-            COALESCE(SUM(CASE WHEN t.pending THEN 1 ELSE 0 END), 0) as pending_count,
-            COALESCE(SUM(CASE WHEN t.paid THEN 1 ELSE 0 END), 0) as paid_count
-        FROM users u
-        LEFT JOIN transactions t ON u.id = t.user_id
-        WHERE u.id = :user_id
-        GROUP BY u.id, u.email
-    """
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
+    result = await request.state.connection.execute(
+        _Q_USER_STATS,
         {"user_id": user_id}
     )
-    row = result.first()
+    row = result.mappings().first()
     if not row:
         raise HTTPException(status_code=404, detail="User not found")
-    return dict(row._mapping)
+    return row
 
 @app.get("/transactions/daily", response_model=List[DailySummary])
 async def daily_transaction_summary(request: Request, days: int = Query(7, ge=1, le=365)):
     """Get transaction summaries grouped by day"""
-    query = """
-        SELECT
-            DATE(created)::text as date,
-            COUNT(*) as transaction_count,
-            ROUND(SUM(amount)::numeric, 2)::float as total_amount
-        FROM transactions
-        WHERE created >= NOW() - INTERVAL '1 day' * :days
-        GROUP BY DATE(created)
-        ORDER BY date DESC
-    """
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
+    result = await request.state.connection.execute(
+        _Q_DAILY_SUMMARY,
         {"days": days}
     )
-    summaries = [dict(row._mapping) for row in result]
-    return summaries
+    return Response(result.scalar(), media_type="application/json")
 
-@app.get("/transactions/pending", response_model=List[TransactionResponse])
+@app.get("/transactions/pending", response_model=List[TransactionListItem])
 async def get_pending_transactions(request: Request, limit: int = Query(50, ge=1, le=500)):
     """Get all pending transactions"""
-    query = """
-        SELECT id, user_id, amount, currency, subid, pending, paid, created, updated
-        FROM transactions
-        WHERE pending = true
-        ORDER BY created DESC
-        LIMIT :limit
-    """
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
-        {"limit": limit}
-    )
-    transactions = [dict(row._mapping) for row in result]
-    return transactions
+    rows = await stream_rows(_Q_PENDING_TRANSACTIONS, {"limit": limit})
+    return StreamingResponse(json_array(rows), media_type="application/json")
 
 # ============ Interview Challenge Endpoints ============
 
 @app.get("/reports/top-users", response_model=List[TopUser])
 async def top_users_by_volume(request: Request, limit: int = Query(10, ge=1, le=100)):
     """Get top users ranked by total transaction amount (common interview task)"""
-    query = """
-        SELECT
-            u.id as user_id,
-            u.email,
-            ROUND(SUM(t.amount)::numeric, 2)::float as total_amount,
-            COUNT(t.id) as transaction_count
-        FROM users u
-        LEFT JOIN transactions t ON u.id = t.user_id
-        GROUP BY u.id, u.email
-        ORDER BY total_amount DESC
-        LIMIT :limit
-    """
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
-        {"limit": limit}
-    )
-    users = [dict(row._mapping) for row in result]
-    return users
+    users = await get_top_users(request.state.connection, limit)
+    return Response(users, media_type="application/json")
 
 @app.get("/reports/suspicious-transactions", response_model=List[SuspiciousTransaction])
 async def suspicious_transactions(request: Request, limit: int = Query(50, ge=1, le=500)):
     """Find suspicious transactions (unusually large or rapid patterns)"""
-    query = """
-        SELECT
-            id,
-            user_id,
-            amount,
-            'Large transaction (>90th percentile)' as reason,
-            created
-        FROM transactions
-        WHERE amount > (
-            SELECT PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY amount) FROM transactions
-        )
-        ORDER BY amount DESC
-        LIMIT :limit
-    """
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
-        {"limit": limit}
+    p90 = await get_p90(request.state.connection)
+    result = await request.state.connection.execute(
+        _Q_SUSPICIOUS_TRANSACTIONS,
+        {"p90": p90, "limit": limit}
     )
-    transactions = [dict(row._mapping) for row in result]
-    return transactions
+    transactions = result.mappings().all()
+    return FastJSONResponse(transactions)
 
-@app.get("/transactions/unpaid", response_model=List[TransactionResponse])
+@app.get("/transactions/unpaid", response_model=List[TransactionListItem])
 async def unpaid_transactions(request: Request, limit: int = Query(50, ge=1, le=500)):
     """Get unpaid but confirmed (non-pending) transactions"""
-    query = """
-        SELECT id, user_id, amount, currency, subid, pending, paid, created, updated
-        FROM transactions
-        WHERE pending = false AND paid = false
-        ORDER BY created DESC
-        LIMIT :limit
-    """
-    result = request.state.connection.execute(
-        sqlalchemy.text(query),
-        {"limit": limit}
-    )
-    transactions = [dict(row._mapping) for row in result]
-    return transactions
+    rows = await stream_rows(_Q_UNPAID_TRANSACTIONS, {"limit": limit})
+    return StreamingResponse(json_array(rows), media_type="application/json")
+
+# ============ Dashboard ============
+
+DASHBOARD_TOP_USERS = 10
+DASHBOARD_DAYS = 7
+
+@app.get("/dashboard", response_model=Dashboard)
+async def dashboard(request: Request):
+    """Get the transaction summary, top users and last week's daily totals in one call"""
+    payload = await get_dashboard(request.state.connection, DASHBOARD_TOP_USERS, DASHBOARD_DAYS)
+    return Response(payload, media_type="application/json")
 
 if __name__ == "__main__":
     uvicorn.run("sandbox.app:app", host="0.0.0.0", port=5000, reload=True)
@@ -0,0 +1,3 @@
+-- Lets /reports/top-users and /transactions/user/{user_id}/stats aggregate per user from the index alone.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_txn_user
+    ON transactions (user_id) INCLUDE (amount, pending, paid);
@@ -0,0 +1,3 @@
+-- Lets /reports/suspicious-transactions walk amounts above the cached p90 in order.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_txn_amount
+    ON transactions (amount DESC);
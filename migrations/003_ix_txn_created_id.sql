@@ -0,0 +1,4 @@
+-- Serves /transactions keyset pagination: ORDER BY created DESC, id DESC with (created, id) < (...).
+-- INCLUDEs the columns the listing projects so pages can be served by index-only scans.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_txn_created_id
+    ON transactions (created DESC, id DESC) INCLUDE (user_id, amount, currency);
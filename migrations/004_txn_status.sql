@@ -0,0 +1,13 @@
+-- Single status column for the (pending, paid) state machine:
+--   0 = pending, 1 = confirmed but unpaid, 2 = paid.
+-- It is generated from the existing flags, so writers keep setting pending/paid
+-- and the two can never disagree. Adding a stored generated column rewrites the
+-- table under an ACCESS EXCLUSIVE lock; run it in a maintenance window.
+ALTER TABLE transactions
+    ADD COLUMN IF NOT EXISTS status smallint NOT NULL
+    GENERATED ALWAYS AS (CASE WHEN pending THEN 0 WHEN paid THEN 2 ELSE 1 END) STORED;
+
+-- Serves /transactions/pending and /transactions/unpaid:
+-- "WHERE status = N ORDER BY created DESC LIMIT n" is a bounded index scan.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_txn_status_created
+    ON transactions (status, created DESC);
@@ -0,0 +1,3 @@
+-- Covering index for /users/{user_id}/transactions, so it can be served by an index-only scan.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_txn_user_created
+    ON transactions (user_id, created DESC) INCLUDE (id, amount, currency);
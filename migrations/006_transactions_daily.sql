@@ -0,0 +1,21 @@
+-- Per-day transaction totals backing /transactions/daily.
+-- The app refreshes it with REFRESH MATERIALIZED VIEW CONCURRENTLY, which needs the unique index.
+CREATE MATERIALIZED VIEW IF NOT EXISTS transactions_daily AS
+    SELECT
+        DATE(created) AS day,
+        COUNT(*) AS transaction_count,
+        SUM(amount) AS total_amount
+    FROM transactions
+    GROUP BY DATE(created);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_transactions_daily_day
+    ON transactions_daily (day);
+
+-- When transactions_daily was last refreshed, so only one worker refreshes it per interval.
+CREATE TABLE IF NOT EXISTS transactions_daily_refreshed (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    refreshed_at timestamptz NOT NULL
+);
+
+INSERT INTO transactions_daily_refreshed (refreshed_at) VALUES (now())
+    ON CONFLICT DO NOTHING;